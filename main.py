@@ -7,14 +7,20 @@ __version__ = "0.1.0"
 __license__ = "MIT"
 
 import ast
+import atexit
+import functools
 import gnupg
+import hashlib
 import json
 import logging
 import logging.config
+import mmap
 import os
-import re
+import subprocess
 import sys
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from datetime import datetime
 from pathlib import Path
@@ -32,57 +38,104 @@ app = typer.Typer()
 
 logger = None
 
+#   built once for exportOne -- called per row in bulk exports
+_SLASH_TRANS = str.maketrans({'/': '_'})
+
+#   one prepared statement serves every bulk-imported row --
+#       bypasses sqlite_utils' per-dict schema introspection
+INSERT_ACCOUNT = "INSERT INTO ACCOUNT(service,username,password,tag,note) VALUES(?,?,?,?,?)"
+
+@functools.lru_cache(maxsize=8)
+def open_db(dbfile):
+    """
+    Open a Database on dbfile with tuned PRAGMAs --
+        WAL + relaxed sync cuts the per-write fsync cost way down
+        cached per path, so every caller shares one connection
+    """
+    db = Database(dbfile)
+    db.conn.executescript(
+        "PRAGMA journal_mode=WAL; "
+        "PRAGMA synchronous=NORMAL; "
+        "PRAGMA temp_store=MEMORY; "
+        "PRAGMA cache_size=-20000; "
+        "PRAGMA mmap_size=268435456;"
+    )
+    #   refresh planner statistics on the way out
+    atexit.register(db.conn.execute, "PRAGMA optimize")
+    return db
+
 class PassCfg:
+    #   parsed config cache shared by all instances --
+    #       keyed by path, holds (mtime_ns, ConfigParser)
+    _cache = {}
+
     def __init__(self, dbfile, configfile, verbose=False):
         self.db = dbfile
         self.configfile = configfile
         self.verbose = verbose
 
-    def set_config(self, section, key, value):
+    def _load(self):
+        """
+        Parse the config file once and reuse the parse until the file changes
+        """
         config_file_path = self.configfile
+        try:
+            mtime = os.stat(config_file_path).st_mtime_ns
+        except (OSError, IOError) as e:
+            raise Exception("Couldn't find path to config.ini.") from e
+        cached = PassCfg._cache.get(config_file_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
         config = ConfigParser()
+        config.read(config_file_path)
+        #   third slot caches values parsed with ast.literal_eval
+        PassCfg._cache[config_file_path] = (mtime, config, {})
+        return config
+
+    def get_literal(self, section, key):
+        """
+        get_config plus ast.literal_eval, with the parsed value cached
+            -- literal_eval runs the full Python parser, no need to
+               redo it while the config file is unchanged
+        """
+        self._load()
+        literals = PassCfg._cache[self.configfile][2]
+        if (section, key) not in literals:
+            literals[(section, key)] = ast.literal_eval(self.get_config(section, key))
+        return literals[(section, key)]
+
+    def set_config(self, section, key, value):
+        config = self._load()
+        config[section][key] = value
         try:
-            with open(config_file_path) as conf:
-                config.read(config_file_path)
-                config[section][key] = value
-                with open(config_file_path, 'w') as conf:
-                    config.write(conf)
+            with open(self.configfile, 'w') as conf:
+                config.write(conf)
         except (OSError, IOError) as e:
             raise Exception("Couldn't find path to config.ini.") from e
+        #   file just changed on disk -- drop the cached parse
+        PassCfg._cache.pop(self.configfile, None)
         if self.verbose:
             print(f"  SET config[{section}, {key}] = {value}", file=sys.stderr)
 
     def get_config(self, section, key):
-        config_file_path = self.configfile
-        config = ConfigParser()
-        try:
-            with open(config_file_path) as conf:
-                config.read(config_file_path)
-                value = config.get(section, key)
-                if self.verbose:
-                    print(f"  GET config[{section}, {key}] = {value}", file=sys.stderr)
-                return value
-        except (OSError, IOError) as e:
-            raise Exception("Couldn't find path to config.ini.") from e
+        config = self._load()
+        value = config.get(section, key)
+        if self.verbose:
+            print(f"  GET config[{section}, {key}] = {value}", file=sys.stderr)
+        return value
 
     def list_config(self):
-        config_file_path = self.configfile
-        config = ConfigParser()
+        config = self._load()
         print(f"\n--- Configuration ---")
         print(f"Database file: {self.db}")
         print(f"Contents of config file: {self.configfile}")
-        try:
-            with open(config_file_path) as conf:
-                config.read(config_file_path)
-                for section in config.sections():
-                    print(f"    {section}")
-                    for key in config[section]:
-                        _value = config.get(section, key)
-                        value = _value if _value else '-NULL-'
-                        print(f"        {key} :   {value}")
-                    print()
-        except (OSError, IOError) as e:
-            raise Exception("Couldn't find path to config.ini.") from e
+        for section in config.sections():
+            print(f"    {section}")
+            for key in config[section]:
+                _value = config.get(section, key)
+                value = _value if _value else '-NULL-'
+                print(f"        {key} :   {value}")
+            print()
 
     def __repr__(self):
         return f"<PassDB: {self.db}>\n<Cfg file: {self.configfile}>"
@@ -91,7 +144,7 @@ class PassCfg:
         '''
         Check if ACCOUNT table lives in db file and create it if NOT
         '''
-        db = Database(self.db)
+        db = open_db(self.db)
         db['ACCOUNT'].create({
             "id": int,
             "service": str,
@@ -100,6 +153,23 @@ class PassCfg:
             "tag": str,
             "note": str,
         }, pk="id", if_not_exists=True)
+        #   index the lookup columns so search/remove need not scan the table
+        for column in ['service', 'username', 'tag']:
+            db['ACCOUNT'].create_index([column], if_not_exists=True)
+        #   compound index covers the service+username search branches
+        db['ACCOUNT'].create_index(['service', 'username'], if_not_exists=True)
+        #   covering index feeds the password-less listing straight
+        #       from the index leaves, never touching the row heap
+        db['ACCOUNT'].create_index(['service', 'username', 'tag', 'note'],
+            index_name='idx_ACCOUNT_cover', if_not_exists=True)
+        #   FTS5 mirror turns the LIKE '%...%' full scans into inverted
+        #       index lookups -- triggers keep it in sync with ACCOUNT,
+        #       including the raw executemany bulk-import path
+        if not db['ACCOUNT'].detect_fts():
+            db['ACCOUNT'].enable_fts(['service', 'username', 'tag', 'note'],
+                create_triggers=True)
+        #   give the planner statistics so it actually picks the indexes
+        db.conn.execute("ANALYZE")
 
 def getGPGconfig(cfgfile):
     """
@@ -111,29 +181,51 @@ def getGPGconfig(cfgfile):
         key
     """
     cfg = PassCfg('dontcare', cfgfile)
-    gnupg_home = cfg.get_config("GPG", "gnupg_home")
-    keyring = cfg.get_config("GPG", "keyring")
-    recipients = cfg.get_config("GPG", "recipients")
-    symmetric_encryption = cfg.get_config("GPG", "symmetric_encryption")
-    key = ast.literal_eval(cfg.get_config("ENCRYPTION_KEY", "key"))
+    #   one cached parse serves all five keys
+    config = cfg._load()
+    gnupg_home = config.get("GPG", "gnupg_home")
+    keyring = config.get("GPG", "keyring")
+    recipients = config.get("GPG", "recipients")
+    symmetric_encryption = config.get("GPG", "symmetric_encryption")
+    key = cfg.get_literal("ENCRYPTION_KEY", "key")
     return gnupg_home, keyring, recipients, symmetric_encryption, key
 
 class GPGCipher(object):
+    #   one gnupg.GPG per (gnupghome, keyring), shared by all cipher
+    #       instances -- EncryptPassword/DecryptPassword build a fresh
+    #       GPGCipher per call, but the GPG handle survives across them
+    _GPG_CACHE = {}
+
     def __init__(self, gnupghome=None, keyring=None, recipients=None, symmetric=None):
         self.gnupghome = os.path.expanduser(gnupghome)
         self.keyring = keyring
         self.recipients = recipients
-        self.symmetric = symmetric
+        #   config hands the mode over as the string 'True'/'False' --
+        #       parse it once here instead of comparing per call
+        self.symmetric = (symmetric == 'True')
+        self._gpg = None
 
     def __repr__(self):
         return f"<GPGhome: {self.gnupghome}>\n<Keyring: {self.keyring}>"
 
+    def _get_gpg(self):
+        """
+        Build the gnupg.GPG object once per (gnupghome, keyring) and
+            reuse it -- construction re-scans the keyring
+        """
+        if self._gpg is None:
+            cache_key = (self.gnupghome, self.keyring)
+            if cache_key not in GPGCipher._GPG_CACHE:
+                if self.gnupghome:
+                    GPGCipher._GPG_CACHE[cache_key] = gnupg.GPG(gnupghome=self.gnupghome, keyring=self.keyring)
+                else:
+                    GPGCipher._GPG_CACHE[cache_key] = gnupg.GPG()
+            self._gpg = GPGCipher._GPG_CACHE[cache_key]
+        return self._gpg
+
     def encrypt(self, data, passphrase=None):
-        if self.gnupghome:
-            cipher = gnupg.GPG(gnupghome=self.gnupghome, keyring=self.keyring)
-        else:
-            cipher = gnupg.GPG()
-        if self.symmetric == 'True':
+        cipher = self._get_gpg()
+        if self.symmetric:
             #print(f"### SYMMETRIC encryption ###")
             crypted = cipher.encrypt(
                 data,
@@ -156,16 +248,16 @@ class GPGCipher(object):
             sys.exit(96)
 
     def decrypt(self, data, passphrase=None, file=False):
-        if self.gnupghome:
-            cipher = gnupg.GPG(gnupghome=self.gnupghome, keyring=self.keyring)
-        else:
-            cipher = gnupg.GPG()
+        cipher = self._get_gpg()
         #   no need to distinguish between pub- or symmetric- encrypted data
         if file:
-            clear = cipher.decrypt_file(
-                open(data, 'rb'),
-                passphrase = passphrase
-            )
+            #   close the handle when done -- the bulk importer runs
+            #       this once per file
+            with open(data, 'rb') as f:
+                clear = cipher.decrypt_file(
+                    f,
+                    passphrase = passphrase
+                )
         else:
             clear = cipher.decrypt(
                 data,
@@ -178,29 +270,76 @@ class GPGCipher(object):
             print(f"  !!! Check if key cache expired !!!")
             sys.exit(97)
 
-def EncryptPassword(data, cfgfile, transcode=False):
-    '''
-    Encrypt the given data/string of password with cipher
-    '''
+    def decrypt_many(self, ciphertexts, passphrase=None):
+        """
+        Decrypt a batch of ciphertexts, overlapping the gpg waits
+            gnupg offers no multi-message decrypt, so each ciphertext
+            still gets its own gpg run -- but they all share this
+            cipher's cached handle and run concurrently, so the batch
+            costs roughly one subprocess wait instead of N
+            returns plaintexts in input order
+        """
+        if not ciphertexts:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(ciphertexts), os.cpu_count() or 4)) as ex:
+            return list(ex.map(lambda data: self.decrypt(data, passphrase), ciphertexts))
+
+#   GPGCipher per (cfgfile, symmetric) -- EncryptPassword and
+#       DecryptPassword run once per row in hot loops
+_CIPHER_CACHE = {}
+
+def getCipher(cfgfile, transcode=False):
+    """
+    Build (or reuse) the GPGCipher for cfgfile
+        returns (cipher, key)
+    """
     home, keyring, recipients, symmetric, key = getGPGconfig(cfgfile)
     #   negate symmetric to achieve trancode
     #
     if transcode:
         symmetric = 'False' if symmetric=='True' else 'True'
-    cipher = GPGCipher(home, keyring, recipients, symmetric)
+    cache_key = (cfgfile, symmetric)
+    if cache_key not in _CIPHER_CACHE:
+        _CIPHER_CACHE[cache_key] = GPGCipher(home, keyring, recipients, symmetric)
+    return _CIPHER_CACHE[cache_key], key
+
+def EncryptPassword(data, cfgfile, transcode=False):
+    '''
+    Encrypt the given data/string of password with cipher
+    '''
+    cipher, key = getCipher(cfgfile, transcode)
     encoded = cipher.encrypt(data, key)
     #print(f"encrypting password: {data}")
     return encoded
 
+def plaintextCacheOn(cfgfile):
+    """
+    Check the opt-in [CACHE] plaintext_lru switch
+        -- off by default: cached plaintext stays in memory
+    """
+    config = PassCfg('', cfgfile)._load()
+    return config.getboolean('CACHE', 'plaintext_lru', fallback=False)
+
+@functools.lru_cache(maxsize=512)
+def _decryptCached(data, cfgfile):
+    cipher, key = getCipher(cfgfile)
+    return cipher.decrypt(data, key)
+
+#   plaintext must not outlive the process -- drop it before exit
+atexit.register(_decryptCached.cache_clear)
+
 def DecryptPassword(data, cfgfile, file=None):
     '''
     Decrypt the given data/string of encoded password with cipher.
+        With [CACHE] plaintext_lru enabled, repeated ciphertexts skip
+        the gpg fork within one session.
     '''
-    home, keyring, recipients, symmetric, key = getGPGconfig(cfgfile)
-    cipher = GPGCipher(home, keyring, recipients, symmetric)
+    cipher, key = getCipher(cfgfile)
     #print(f"\n----- cipher: {cipher.__repr__} -----\n")
     if file:
         clear = cipher.decrypt(data, key, file=True)
+    elif plaintextCacheOn(cfgfile):
+        clear = _decryptCached(data, cfgfile)
     else:
         clear = cipher.decrypt(data, key)
     #print(f"decrypting password: {clear}")
@@ -209,33 +348,48 @@ def DecryptPassword(data, cfgfile, file=None):
 def displayResults(results, cfgfile=None, showpassword=False):
     """
     Display query results
-        results should be list of entries, NOT a generator
+        results may be a list or a query generator --
+        with showpassword the rows are materialized once to
+        batch-decrypt the passwords, otherwise they stream through
     """
+    lines = []
     if showpassword:
-        print(f"id  service         username        tag         note")
-        print(f"password")
-    else:
-        print(f"id  service         username        tag         note")
-    if results:
-        for r in results:
-            #   convert null value to string '---Null---'
-            for col in ['id', 'service', 'username', 'tag', 'note']:
-                r[col] = r[col] if r[col] else '-- Null --'
-            print(f"{r['id']:3}:: {r['service']}:: {r['username']}:: {r['tag']}:: {r['note']}")
-            if showpassword and cfgfile:
-                password = DecryptPassword(r['password'], cfgfile)
-                print(f"{password}")
+        lines.append(f"id  service         username        tag         note")
+        lines.append(f"password")
     else:
-        print(f"--- Empty result ---")
+        lines.append(f"id  service         username        tag         note")
+    passwords = None
+    if showpassword and cfgfile:
+        results = list(results)
+        #   decrypt the whole column as one batch
+        ciphertexts = [r['password'] for r in results]
+        if ciphertexts:
+            #   resolve the cipher once -- no per-row config lookups
+            cipher, key = getCipher(cfgfile)
+            passwords = cipher.decrypt_many(ciphertexts, key)
+    null = '-- Null --'
+    empty = True
+    for i, r in enumerate(results):
+        empty = False
+        #   fall back to '-- Null --' for null values, no dict mutation
+        lines.append(f"{r['id'] or null:3}:: {r['service'] or null}:: {r['username'] or null}:: {r['tag'] or null}:: {r['note'] or null}")
+        if passwords:
+            lines.append(f"{passwords[i]}")
+    if empty:
+        lines.append(f"--- Empty result ---")
         global logger
         logger.info(f"--- Empty result ---")
+    #   one stdout write for the whole result set
+    sys.stdout.write('\n'.join(lines) + '\n')
 
-def insertEntry(dbfile, service, password, username=None, tag=None, note=None, dir=None):
+def buildEntry(service, password, username=None, tag=None, note=None, date=None):
     """
-    Compose and insert one entry to Db
+    Compose one entry -- pure, no Db access
+        bulk importers pass date in, computed once for the whole run
     """
     entry = {}
-    date = f'{datetime.today():%Y-%m-%d}'
+    if date is None:
+        date = f'{datetime.today():%Y-%m-%d}'
     entry["service"] = service.strip()
     entry["username"] = username.strip() if username else 'Import'
     entry["password"] = password
@@ -243,69 +397,100 @@ def insertEntry(dbfile, service, password, username=None, tag=None, note=None, d
     entry["tag"] = tag.strip()
     #   setup note
     entry["note"] = f"Imported on {date}, {note}".strip() if note else f"Imported on {date}"
+    return entry
+
+def insertEntry(dbfile, service, password, username=None, tag=None, note=None, dir=None):
+    """
+    Compose and insert one entry to Db
+    """
+    entry = buildEntry(service, password, username, tag, note)
     #   insert to Db
-    db = Database(dbfile)
+    db = open_db(dbfile)
     print(f"--- insert following entry to DB {dbfile}")
     print(f"  service      username       tag         note")
     print(f"{entry["service"]}, {entry["username"]},  {entry["tag"]}, {entry["note"]}")
-    db['ACCOUNT'].insert(entry) 
+    db['ACCOUNT'].insert(entry)
 
-def exportOne(entry, root=None):
+def exportOne(entry, root=None, createdDirs=None):
     """
     Export one entry to a file where
         dir is composed from tag, and
         baseame is service
+        createdDirs -- optional set of dirs known to exist, so bulk
+            export skips the mkdir syscall on repeated tags
     """
-    dirs = re.split(r'\s+', entry['tag'].strip())
+    #   str.split() with no argument already collapses whitespace runs
+    dirs = entry['tag'].split()
     dir = '/'.join(dirs)
     if root:
         dir = f"{root}/{dir}"
     #   take care of '/' in service that was used as basename of file
     #       eg, someone uses "https://any.com/app" as service name
-    basename = entry['service'].replace('/','_').replace(' ','-')
+    basename = entry['service'].translate(_SLASH_TRANS).replace(' ','-')
     filename = f"{dir}/{basename}.gpg"
     print(f"entry id: {entry['id']}, service: {'service'}, tag: {entry['tag']}")
     print(f"exporting entry to file: {filename}")
     #   creat dir if not exist
-    try:
-        os.makedirs(dir)
-    except FileExistsError:
-        pass
+    if createdDirs is None or dir not in createdDirs:
+        os.makedirs(dir, exist_ok=True)
+        if createdDirs is not None:
+            createdDirs.add(dir)
     if type(entry['password']) is str:
         with open(filename, "w") as f:
             f.write(entry['password'])
     else:
         print(f"--- skip entry['service'] with password of type {type(entry['password'])} ---")
 
+@functools.lru_cache(maxsize=None)
+def _whereShape(hasService, hasUsername, hasTag):
+    """
+    SQL text of the where clause for one combination of given fields
+        -- the text depends only on which fields are present, so the
+           eight possible shapes are built once and cached; every call
+           with the same combination hands sqlite the identical string
+           and hits its per-connection prepared-statement cache
+        service matches exactly when combined with other fields,
+        username matches exactly only alongside service,
+        tag always matches as substring
+    """
+    clauses = []
+    if hasService:
+        clauses.append("service=?" if (hasUsername or hasTag) else "service like ?")
+    if hasUsername:
+        clauses.append("username=?" if hasService else "username like ?")
+    if hasTag:
+        clauses.append("tag like ?")
+    if not clauses:
+        return None
+    return f"where {' and '.join(clauses)}"
+
 def buildWhereClause(id=None, service=None, username=None, tag=None):
     """
     Build the where clause for search/query
         -- for search and delete query
+        returns (whereClause, params) with '?' placeholders, so
+        values never land in the SQL text and SQLite can reuse
+        the same prepared statement across calls
     """
     if id:
-        whereClause = f"where id='{id}'"
-    elif service and username and tag:
-        whereClause = f"where service='{service}' and username='{username}' and tag like '%{tag}%'"
-    elif service and username:
-        whereClause = f"where service='{service}' and username='{username}'"
-    elif service and tag:
-        whereClause = f"where service='{service}' and tag like '%{tag}%'"
-    elif username and tag:
-        whereClause = f"where username like '%{username}%' and tag like '%{tag}%'"
-    elif service:
-        whereClause = f"where service like '%{service}%'"
-    elif username:
-        whereClause = f"where username like '%{username}%'"
-    elif tag:
-        whereClause = f"where tag like '%{tag}%'"
-    else:
+        return f"where id=?", [id]
+    whereClause = _whereShape(bool(service), bool(username), bool(tag))
+    if whereClause is None:
         print(f"--- No support on query on: ---")
         print(f"    id: {id}")
         print(f"    service: {service}")
         print(f"    username: {username}")
         print(f"    tag: {tag}")
-        return None
-    return whereClause
+        return None, None
+    #   params line up with the clause order: service, username, tag
+    params = []
+    if service:
+        params.append(service if (username or tag) else f"%{service}%")
+    if username:
+        params.append(username if service else f"%{username}%")
+    if tag:
+        params.append(f"%{tag}%")
+    return whereClause, params
 
 def multilineInput(opening='content'):
     """
@@ -313,40 +498,69 @@ def multilineInput(opening='content'):
     """
     print(opening)
     print(f"Enter/Paste your {opening}. Ctrl-D or Ctrl-Z (windows?) to save it.")
-    lines = []
-    while True:
-        try:
-            line = input()
-        except EOFError:
-            break
-        lines.append(line)
-    #   combine all lines to one sting
-    result = f"{'\n'.join(lines)}"
-    return result
+    #   slurp everything up to EOF in one read -- no per-line loop,
+    #       and pasted blocks arrive in a single buffered gulp
+    return sys.stdin.read().rstrip('\n')
+
+#   readFile payloads above this size go through mmap
+_MMAP_THRESHOLD = 64 * 1024
 
-def readFile(fileName):
+def readFile(fileName, binary=False):
     """
     read and return text from file
+        password files are text, so default to text mode and skip the
+        bytes round-trip; binary=True serves hashing and raw payloads
+        large binary files come straight out of a memory mapping in one
+        copy, instead of being assembled chunk by chunk through
+        buffered IO -- gpg and the print call sites need real bytes,
+        so the mapping itself is not handed out
     """
+    if not binary:
+        with open(fileName, 'r', encoding='utf-8') as f:
+            return f.read()
     with open(fileName, 'rb') as f:
+        if os.path.getsize(fileName) > _MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return bytes(mm)
         content = f.read()
     return content
 
-def entry2jsonFile(entry, tempFile):
+def entry2jsonFile(entry, tempFile, pretty=True):
     """
     Export decoded password entry to a json file for editing
         id was removed before export
+        tempFile may be a path or an already-open text file object --
+        a file object is rewritten in place, flushed and fsync'd, so
+        the caller keeps one open handle instead of re-opening by name
+        pretty=False writes compact json (backup copies nobody edits
+        by hand -- the compact form takes json's C fast path)
     """
-    with open(tempFile, 'w') as f:
-        json.dump(entry, f, indent=4, sort_keys=True)    
+    fileObject = hasattr(tempFile, 'write')
+    if fileObject:
+        f = tempFile
+        f.seek(0)
+        f.truncate()
+    else:
+        f = open(tempFile, 'w')
+    if pretty:
+        json.dump(entry, f, indent=4, sort_keys=True)
+    else:
+        json.dump(entry, f, separators=(',', ':'))
+    if fileObject:
+        #   make sure the editor sees the content on disk
+        f.flush()
+        os.fsync(f.fileno())
+    else:
+        f.close()
 
 def jsonFile2entry(tempFile):
     """
     Import an entry of password for updating
+        re-opens by name -- editors like vi may have replaced the
+        inode behind the original handle
     """
-    f = open(tempFile, 'r')
-    entry = json.load(f)
-    #   encrypt password before updating db
+    with open(tempFile, 'r') as f:
+        entry = json.load(f)
     return entry
 
 @app.callback()
@@ -388,30 +602,50 @@ def showall(dbfile: str='database.db', cfgfile: str='config.ini', showpassword:
     """
     Display all entries in dbfile
     """
-    db = Database(dbfile)
-    myQuery = "select * from ACCOUNT"
+    db = open_db(dbfile)
+    if showpassword:
+        myQuery = "select * from ACCOUNT order by service"
+    else:
+        #   the password blob is the widest column -- leave it out so
+        #       the listing comes straight off the covering index
+        myQuery = "select id, service, username, tag, note from ACCOUNT order by service"
     results = db.query(myQuery)
     displayResults(results, cfgfile, showpassword)
     global logger
     logger.info(myQuery)
 
-@app.command()    
-def fileimport(datafile: str,
-        dbfile: str='database.db', cfgfile: str='config.ini', 
-        username: str='', tag: str='', note: str='', dir: str=''):
+def walkFiles(directory):
     """
-    Import one pwd file to db
-        -- no check on exist or not
-        -- datafile like service.gpg
+    Yield the path of every file under directory --
+        os.scandir hands back DirEntry objects whose is_dir/is_file
+        answers come from the directory read itself, no extra stat()
+    """
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walkFiles(entry.path)
+            elif entry.is_file():
+                #   dot files and editor leftovers never reach the
+                #       importer, so no gpg fork is spent on them
+                if entry.name.startswith('.') or entry.name.endswith(('.swp', '~')):
+                    print(f"!!! Ignore dot/backup file: {entry.name} !!!")
+                    continue
+                yield entry.path
+
+def prepareEntry(datafile, cfgfile, username='', tag='', note='', dir='', date=None):
+    """
+    Decrypt/encrypt one pwd file and compose its entry -- no Db access
+        returns the entry dict, or None for files to ignore
     """
     #   check if datafile with extention '.gpg'
     _dirName = os.path.dirname(datafile)
     filename = os.path.basename(datafile)
-    service, ext = os.path.splitext(filename)
-    if service[0] == '.':
-        print(f"!!! Ignore dot file: {filename} !!!")
+    #   skip dot files and editor leftovers before any decryption
+    if filename.startswith('.') or filename.endswith(('.swp', '~')):
+        print(f"!!! Ignore dot/backup file: {filename} !!!")
         return None
-    elif ext == '.gpg':
+    service, ext = os.path.splitext(filename)
+    if ext == '.gpg':
         clear = DecryptPassword(datafile, cfgfile, file=True)
     else:   # others are assumed to be clear file
         print(f"  ! Treat file {datafile} as a clear file !")
@@ -426,18 +660,36 @@ def fileimport(datafile: str,
         myTag = f"{tag} {myTag}" if tag else f"{myTag}"
     else:
         myTag = tag if tag else "noTag"
+    return buildEntry(service, password, username, myTag, note, date)
+
+@app.command()
+def fileimport(datafile: str,
+        dbfile: str='database.db', cfgfile: str='config.ini',
+        username: str='', tag: str='', note: str='', dir: str=''):
+    """
+    Import one pwd file to db
+        -- no check on exist or not
+        -- datafile like service.gpg
+    """
+    entry = prepareEntry(datafile, cfgfile, username, tag, note, dir)
+    if not entry:
+        return None
     #   insert to Db
-    insertEntry(dbfile, service, password, username, myTag, note)
+    db = open_db(dbfile)
+    print(f"--- insert following entry to DB {dbfile}")
+    print(f"  service      username       tag         note")
+    print(f"{entry["service"]}, {entry["username"]},  {entry["tag"]}, {entry["note"]}")
+    db['ACCOUNT'].insert(entry)
     global logger
     logger.info(\
-        f"import one entry to ACCOUNT where service: {service} and username: {username}"\
+        f"import one entry to ACCOUNT where service: {entry['service']} and username: {entry['username']}"\
         )
     return True
 
 @app.command()
 def dirimport(directory: str,
-        dbfile: str='database.db', cfgfile: str='config.ini', 
-        username: str='', tag: str='', note: str=''):
+        dbfile: str='database.db', cfgfile: str='config.ini',
+        username: str='', tag: str='', note: str='', verbose: bool=False):
 
     """
     Import one pwd file to db
@@ -451,27 +703,60 @@ def dirimport(directory: str,
         print(f"----- {directory} is NOT a directory, see you next time ... -----")
         sys.exit(99)
 
-    #   walk thru all files in directory and process
-    for root, _dirs, files in os.walk(directory):
-        for file in files:
-            datafile = f"{root}/{file}"
+    #   walk thru all files in directory and prepare entries --
+    #       each file pays a gpg decrypt plus a re-encrypt, both
+    #       blocking in subprocesses, so fan them out over threads
+    #       ex.map keeps the entries in walk order
+    datafiles = list(walkFiles(directory))
+    if verbose:
+        for datafile in datafiles:
             print(f"Processing file: {datafile}")
-            fileimport(datafile, dbfile, cfgfile, username, tag, note, directory)
+    #   one date stamp serves the whole import
+    today = f'{datetime.today():%Y-%m-%d}'
+    with ThreadPoolExecutor(max_workers=min(len(datafiles) or 1, os.cpu_count() or 4)) as ex:
+        prepared = ex.map(
+            lambda datafile: prepareEntry(datafile, cfgfile, username, tag, note, directory, today),
+            datafiles)
+        entries = [entry for entry in prepared if entry]
+    #   insert all entries in one transaction --
+    #       one fsync for the whole import instead of one per file
+    db = open_db(dbfile)
+    rows = [(e['service'], e['username'], e['password'], e['tag'], e['note']) for e in entries]
+    with db.conn:
+        db.conn.executemany(INSERT_ACCOUNT, rows)
+    #   table just grew a lot -- refresh the planner statistics
+    db.conn.execute("ANALYZE ACCOUNT")
+    print(f"--- imported {len(entries)} entries to DB {dbfile} ---")
+    global logger
+    logger.info(\
+        f"import {len(entries)} entries to ACCOUNT from directory: {directory}"\
+        )
 
 @app.command()
 def exportdb(dbfile: str='database.db', cfgfile: str='config.ini',
-             directory: str='_Export'):
+             directory: str='_Export', verbose: bool=False):
     """
     export all passwords to files live in {directory}
     """
-    db = Database(dbfile)
-    for entry in db['ACCOUNT'].rows:
-        print(entry)
-        exportOne(entry, directory)
-        global logger
-        logger.info(\
-            f"export entry from ACCOUNT where service: {entry['service']} and username: {entry['username']}"\
-            )
+    db = open_db(dbfile)
+    #   file writes are independent and I/O bound --
+    #       fan them out over a thread pool and reuse known dirs
+    createdDirs = set()
+    global logger
+    with ThreadPoolExecutor(max_workers=16) as ex:
+        futures = []
+        #   only the columns export needs -- skips carrying note and
+        #       username through Python for every row
+        for entry in db.query("select id, service, tag, password from ACCOUNT"):
+            if verbose:
+                print(entry)
+            futures.append(ex.submit(exportOne, entry, directory, createdDirs))
+            logger.info(\
+                f"export entry from ACCOUNT where id: {entry['id']} and service: {entry['service']}"\
+                )
+        #   surface any export error
+        for future in futures:
+            future.result()
 
 @app.command()
 def exportentry(dbfile: str='database.db', cfgfile: str='config.ini',
@@ -479,7 +764,7 @@ def exportentry(dbfile: str='database.db', cfgfile: str='config.ini',
     """
     Export one entry by id
     """
-    db = Database(dbfile)
+    db = open_db(dbfile)
     #   get the entry by id
     id = int(id)
     try:
@@ -501,18 +786,30 @@ def transcodedb(dbfile: str='database.db', cfgfile: str='config.ini'):
     """
     Convert pub <--> symmetirc key encryption
     """
-    db = Database(dbfile)
-    for entry in db['ACCOUNT'].rows:
-        print(f"... transcoding entry with service: {entry['service']} + username: {entry['username']}")
-        clear = DecryptPassword(entry['password'], cfgfile)
-        #   set trancode to `True` in procedure EncrypPassword to activate it
-        #
-        password = EncryptPassword(clear, cfgfile, True)
-        db['ACCOUNT'].update(entry['id'], {'password': password})
+    db = open_db(dbfile)
     #
-    #   get encription type defined (in string format 'True'/'False') in config file and
-    #       convert it to logic
+    #   build both ciphers once outside the loop --
+    #       one GPG handle each for the whole run instead of two per row
     home, keyring, recipients, symmetric, key = getGPGconfig(cfgfile)
+    transcoded = 'False' if symmetric=='True' else 'True'
+    cipher_dec = GPGCipher(home, keyring, recipients, symmetric)
+    cipher_enc = GPGCipher(home, keyring, recipients, transcoded)
+    #   snapshot the rows first, then apply all updates in one executemany --
+    #       one prepared statement reused for every row, one commit at the end
+    rows = list(db.query("select id, service, username, password from ACCOUNT"))
+    for entry in rows:
+        print(f"... transcoding entry with service: {entry['service']} + username: {entry['username']}")
+    #   decrypt the whole password column as one overlapped batch,
+    #       then overlap the re-encrypts the same way -- the N serial
+    #       gpg waits collapse to roughly two batches
+    clears = cipher_dec.decrypt_many([entry['password'] for entry in rows], key)
+    with ThreadPoolExecutor(max_workers=min(len(rows) or 1, os.cpu_count() or 4)) as ex:
+        passwords = list(ex.map(lambda clear: cipher_enc.encrypt(clear, key), clears))
+    updates = [(password, entry['id']) for password, entry in zip(passwords, rows)]
+    with db.conn:
+        db.conn.executemany("UPDATE ACCOUNT SET password=? WHERE id=?", updates)
+    #
+    #   convert encription type (in string format 'True'/'False') to logic
     symmetric = True if symmetric=='True' else False
     global logger
     logger.info(\
@@ -523,24 +820,39 @@ def transcodedb(dbfile: str='database.db', cfgfile: str='config.ini'):
     print(f"\n\n!!! Be sure to update {cfgfile} before next run!!!\n\n")
 
 @app.command()
-def search(dbfile: str='database.db', cfgfile: str='config.ini', 
-           id: str='', service: str='', username: str='', tag: str='', 
-           showpassword: bool=False):
+def search(dbfile: str='database.db', cfgfile: str='config.ini',
+           id: str='', service: str='', username: str='', tag: str='',
+           fulltext: str='', showpassword: bool=False):
     """
     Search on id, service, username and/or tag
+        --fulltext queries the FTS5 index across all four text columns
     """
-    whereClause = buildWhereClause(id, service, username, tag)
+    global logger
+    if fulltext:
+        #   MATCH walks the inverted index instead of scanning every row
+        myQuery = (
+            f"select ACCOUNT.* from ACCOUNT "
+            f"join ACCOUNT_fts on ACCOUNT.id = ACCOUNT_fts.rowid "
+            f"where ACCOUNT_fts match ?"
+        )
+        params = [fulltext]
+        logger.info(f"{myQuery} -- params: {params}")
+        print(f"\nquery: {myQuery}\n")
+        db = open_db(dbfile)
+        displayResults(db.query(myQuery, params), cfgfile, showpassword)
+        return
+    whereClause, params = buildWhereClause(id, service, username, tag)
     if not whereClause:
         #   invalid whereClause, ie, no support for what were given
         return None
     selectPrefix = f"select * from ACCOUNT"
     myQuery = f"{selectPrefix} {whereClause}"
-    global logger
-    logger.info(myQuery)
+    logger.info(f"{myQuery} -- params: {params}")
     print(f"\nquery: {myQuery}\n")
-    db = Database(dbfile)
-    results = [x for x in db.query(myQuery)]
-    displayResults(results, cfgfile, showpassword)
+    db = open_db(dbfile)
+    #   hand the query generator straight through --
+    #       displayResults materializes only when it must decrypt
+    displayResults(db.query(myQuery, params), cfgfile, showpassword)
 
 @app.command()
 def remove(dbfile: str='database.db', cfgfile: str='config.ini', 
@@ -550,15 +862,15 @@ def remove(dbfile: str='database.db', cfgfile: str='config.ini',
     Delete on id, service, username and/or tag
     """
     deleted = []
-    whereClause = buildWhereClause(id, service, username, tag)
+    whereClause, params = buildWhereClause(id, service, username, tag)
     if not whereClause:
         #   invalid whereClause, ie, nothing to delete
         return deleted
     selectPrefix = f"select * from ACCOUNT"
     myQuery = f"{selectPrefix} {whereClause}"
     print(f"\nquery: {myQuery}\n")
-    db = Database(dbfile)
-    results = [x for x in db.query(myQuery)]
+    db = open_db(dbfile)
+    results = list(db.query(myQuery, params))
     if not results:
         print(f"\n--- Found NO entry to DELETE ---")
         print(f"--- Have a good one ---\n")
@@ -604,7 +916,7 @@ def passgen(dbfile: str='database.db', cfgfile: str='config.ini',
     else:
         #   get numberwords, delimiter, case, dictionary from cfgfile
         numberwords =  int(cfg.get_config("PASSWORD_PREFERENCE", "numberwords"))
-        delimiter = ast.literal_eval(cfg.get_config("PASSWORD_PREFERENCE", "delimiter"))
+        delimiter = cfg.get_literal("PASSWORD_PREFERENCE", "delimiter")
         caseselection = cfg.get_config("PASSWORD_PREFERENCE", "caseselection")
         dict = cfg.get_config("PASSWORD_PREFERENCE", "dictionary")
         for i in range(10):
@@ -621,7 +933,7 @@ def passgen(dbfile: str='database.db', cfgfile: str='config.ini',
         entry["tag"] = 'passgen'
         entry["note"] = f"{note}, created on {date}"
         #   insert to Db
-        db = Database(dbfile)
+        db = open_db(dbfile)
         print(f"--- insert following entry to DB {dbfile}")
         print(f"  service      username       tag         note")
         print(f"{entry["service"]}:: {entry["username"]}::  {entry["tag"]}:: {entry["note"]}")
@@ -647,7 +959,7 @@ def addentry(dbfile: str='database.db', cfgfile: str='config.ini',
     elif xkcd:
         #   get numberwords, delimiter, case, dictionary from cfgfile
         numberwords =  int(cfg.get_config("PASSWORD_PREFERENCE", "numberwords"))
-        delimiter = ast.literal_eval(cfg.get_config("PASSWORD_PREFERENCE", "delimiter"))
+        delimiter = cfg.get_literal("PASSWORD_PREFERENCE", "delimiter")
         caseselection = cfg.get_config("PASSWORD_PREFERENCE", "caseselection")
         dict = cfg.get_config("PASSWORD_PREFERENCE", "dictionary")
         clear = xkcdstyle(numberwords, delimiter, caseselection, dict)
@@ -667,14 +979,16 @@ def addentry(dbfile: str='database.db', cfgfile: str='config.ini',
         clear = multilineInput("Password: ")
     elif not random and not xkcd and editor:
         print(f"\n\n --- Will open '{myeditor}' for creating password in {delay} seconds ---\n\n")
-        os.system(f"sleep {delay}")
-        os.system(f"{myeditor} {tempPwdFile}")
+        time.sleep(float(delay))
+        subprocess.run([myeditor, tempPwdFile])
         #   looks like vi (and other editor?) adds newline at EOF
         #       let's take care of this
         if myeditor in ['vi', 'vim']:
-            os.system(f"truncate -s -1 {tempPwdFile}")
+            #   clamp at zero -- the file is still empty when the user
+            #       quits without saving, and os.truncate(path, -1) raises
+            os.truncate(tempPwdFile, max(0, os.path.getsize(tempPwdFile) - 1))
         clear = readFile(f"{tempPwdFile}")
-        os.system(f"unlink {tempPwdFile}")
+        os.unlink(tempPwdFile)
     print(f"--- password: {clear} ---")
     password = EncryptPassword(clear, cfgfile)
     print()
@@ -688,7 +1002,7 @@ def addentry(dbfile: str='database.db', cfgfile: str='config.ini',
     entry["tag"] = tag
     entry["note"] = f"{note}, created on {date}"
     #   insert to Db
-    db = Database(dbfile)
+    db = open_db(dbfile)
     print(f"--- insert following entry to DB {dbfile}")
     print(f"  service      username       tag         note")
     print(f"{entry["service"]}:: {entry["username"]}::  {entry["tag"]}:: {entry["note"]}")
@@ -700,16 +1014,22 @@ def addentry(dbfile: str='database.db', cfgfile: str='config.ini',
 
 @app.command()
 def updateentry(dbfile: str='database.db', cfgfile: str='config.ini',
-            id: str=''):
+            id: str='',
+            service: str='', username: str='', password: str='',
+            tag: str='', note: str=''):
     """
     Update one entry
+        -- any given field option is applied directly, no editor
+        -- without field options, edit the entry as json in the editor
     """
     cfg = PassCfg('dontcare', cfgfile)
     myeditor = cfg.get_config("OTHERS", "editor")
     delay = cfg.get_config("OTHERS", "sleep")
 
-    db = Database(dbfile)
-    fp = tempfile.NamedTemporaryFile(delete_on_close=False)
+    db = open_db(dbfile)
+    #   text mode -- the handle is written through entry2jsonFile and
+    #       stays open across the editor run
+    fp = tempfile.NamedTemporaryFile(mode='w+', delete_on_close=False)
     tempFile = fp.name
     id = int(id)
     try:
@@ -726,22 +1046,50 @@ def updateentry(dbfile: str='database.db', cfgfile: str='config.ini',
     except FileExistsError:
         pass
     copyFileName = f"{entry['id']}_{entry['service'].strip()}_{entry['username'].strip()}.json"
-    entry2jsonFile(entry, f"{copyDirName}/{copyFileName}")
+    entry2jsonFile(entry, f"{copyDirName}/{copyFileName}", pretty=False)
+    global logger
+    #   scripted path: apply field options directly --
+    #       skips the tempfile + json round-trip and the editor fork
+    patch = {column: value for column, value in [
+            ('service', service), ('username', username), ('password', password),
+            ('tag', tag), ('note', note)] if value}
+    if patch:
+        #   only the password needs encryption
+        if 'password' in patch:
+            patch['password'] = EncryptPassword(patch['password'], cfgfile)
+        db['ACCOUNT'].update(id, patch)
+        logger.info(\
+            f"update entry in ACCOUNT where id: {id} with fields: {sorted(patch)}"\
+            )
+        return None
     #   decrypt password before export to file
-    entry['password'] = DecryptPassword(entry['password'], cfgfile)
+    oldCipherText = entry['password']
+    oldClear = DecryptPassword(oldCipherText, cfgfile)
+    entry['password'] = oldClear
     #   hide entry's id -- no update on this column
     del entry['id']
-    #   export enty to temp/json file for edit
-    entry2jsonFile(entry, tempFile)
+    #   export enty to temp/json file for edit -- reuse the open handle
+    entry2jsonFile(entry, fp)
+    #   hash the file before/after the editor, so a no-edit run
+    #       skips the re-encrypt and the UPDATE entirely
+    preEdit = hashlib.blake2b(readFile(tempFile, binary=True)).digest()
     print(f"\n\n --- Will open '{myeditor}' for updating in {delay} seconds ---\n\n")
-    os.system(f"sleep {delay}")
-    os.system(f"{myeditor} {tempFile}")
+    time.sleep(float(delay))
+    subprocess.run([myeditor, tempFile])
+    postEdit = hashlib.blake2b(readFile(tempFile, binary=True)).digest()
+    if preEdit == postEdit:
+        os.unlink(tempFile)
+        print(f"--- No change on entry id: {id}, nothing to update ---")
+        return None
     entry = jsonFile2entry(tempFile)
-    os.system(f"unlink {tempFile}")
-    #   encrypt password before update db
-    entry['password'] = EncryptPassword(entry['password'], cfgfile)
+    os.unlink(tempFile)
+    #   encrypt password before update db --
+    #       keep the old ciphertext when the password itself is untouched
+    if entry['password'] == oldClear:
+        entry['password'] = oldCipherText
+    else:
+        entry['password'] = EncryptPassword(entry['password'], cfgfile)
     db['ACCOUNT'].update(id, entry)
-    global logger
     logger.info(\
         f"update entry in ACCOUNT where service: {entry['service']} and username: {entry['username']}"\
         )
@@ -1,37 +1,63 @@
 
+import functools
 import secrets
 import string
 
-def xkcdstyle(numwords=4, delimiter=' ', caseselection='lower', dict='/usr/share/dict/words'):
+@functools.lru_cache(maxsize=4)
+def _loadWords(dict, caseselection):
     """
-    Generate xkcd style password
-        On standard Linux systems, use dictionary file '/usr/share/dict/words'
-        Other platforms may need to provide their own word-list.
+    Load and case-fold the word-list once per (file, case)
+        ~100k lines -- no need to re-read and re-fold per password
     """
     with open(dict) as f:
-        #   compose words[] based on caseselection
+        #   compose words based on caseselection
         #
         match caseselection:
             case 'upper':
-                words = [word.strip().upper() for word in f]
+                return tuple(word.strip().upper() for word in f)
             case 'first':
-                words = [word.strip().title() for word in f]
+                return tuple(word.strip().title() for word in f)
             case _:
-                words = [word.strip().lower() for word in f]
-    #   compose the password from words[] and delimiter
+                return tuple(word.strip().lower() for word in f)
+
+def xkcdstyle(numwords=4, delimiter=' ', caseselection='lower', dict='/usr/share/dict/words'):
+    """
+    Generate xkcd style password
+        On standard Linux systems, use dictionary file '/usr/share/dict/words'
+        Other platforms may need to provide their own word-list.
+    """
+    words = _loadWords(dict, caseselection)
+    #   compose the password from words and delimiter
     #
     password = delimiter.join(secrets.choice(words) for i in range(numwords))
     return password
 
+#   both alphabets are constants -- build them once at import instead
+#   of concatenating per call
+_ALPHABET = string.ascii_lowercase + string.ascii_uppercase + string.digits
+_ALPHABET_SPECIAL = _ALPHABET + string.punctuation
+
 def randomstyle(numchars=16, specialchar=True):
     """
     Generate random string/password
+        randomness is drawn in one token_bytes batch instead of one
+        urandom read per character; bytes that fall outside the
+        alphabet are rejected, which keeps the distribution uniform
     """
-    alphabet = string.ascii_lowercase + string.ascii_uppercase + string.digits
-    if specialchar:
-        alphabet = alphabet + string.punctuation
-    password = ''.join(secrets.choice(alphabet) for i in range(numchars))
-    return password
+    alphabet = _ALPHABET_SPECIAL if specialchar else _ALPHABET
+    n = len(alphabet)
+    #   smallest all-ones mask covering the alphabet indices
+    mask = (1 << n.bit_length()) - 1
+    chars = []
+    while len(chars) < numchars:
+        #   over-request a little to cover the rejected draws
+        for b in secrets.token_bytes(2 * (numchars - len(chars)) + 8):
+            idx = b & mask
+            if idx < n:
+                chars.append(alphabet[idx])
+                if len(chars) == numchars:
+                    break
+    return ''.join(chars)
 
 def demo():
     """